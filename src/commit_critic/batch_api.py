@@ -0,0 +1,94 @@
+import asyncio
+import json
+from .config import LOG
+from .retry import call_with_retries
+from .ui import styled, DIM
+
+try:
+    # Optional: C-accelerated JSON for the (potentially large) JSONL files
+    import orjson
+except ImportError:
+    orjson = None
+
+_ENDPOINT = "/v1/chat/completions"
+_DONE = ("completed", "failed", "expired", "cancelled")
+
+
+def _encode_requests(requests: dict[str, dict]) -> bytes:
+    """The Batch API input file: one JSON request per line."""
+    records = (
+        {"custom_id": custom_id, "method": "POST", "url": _ENDPOINT, "body": body}
+        for custom_id, body in requests.items()
+    )
+    # default=dict: request bodies share read-only (MappingProxyType) system messages
+    if orjson is not None:
+        return b"\n".join(orjson.dumps(record, default=dict) for record in records)
+    return "\n".join(json.dumps(record, default=dict) for record in records).encode()
+
+
+async def _cancel(client, batch_id: str) -> None:
+    """Best-effort cancel, so a job we stopped waiting for doesn't keep billing."""
+    try:
+        await call_with_retries(client.batches.cancel, batch_id)
+        print(styled(f"  Cancelled batch job {batch_id}", DIM))
+    except Exception as e:
+        LOG.warning("Could not cancel batch job %s: %s", batch_id, e)
+
+
+def _parse_output(text: str, results: dict[str, str]) -> None:
+    """Add the successful responses in an output (or error) JSONL file to *results*."""
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        record = orjson.loads(line) if orjson is not None else json.loads(line)
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            LOG.debug("Batch request %s failed: %s", record.get("custom_id"), record.get("error"))
+            continue
+        results[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"] or ""
+
+
+async def run_batch(client, requests: dict[str, dict], poll_interval: float = 10.0) -> dict[str, str]:
+    """Run chat-completion *requests* ({custom_id: create() kwargs}) as one Batch API job.
+
+    Returns {custom_id: response text} for the requests that succeeded; the
+    caller re-sends the rest. Batch jobs trade latency (minutes, up to the
+    24h window) for roughly half the per-token price of synchronous calls.
+    Every call is retried on transient errors; if waiting is abandoned anyway
+    (an error, Ctrl-C), the job is cancelled so it isn't paid for twice.
+    """
+    upload = await call_with_retries(
+        client.files.create,
+        file=("commit_critic_batch.jsonl", _encode_requests(requests)),
+        purpose="batch",
+    )
+    batch = await call_with_retries(
+        client.batches.create,
+        input_file_id=upload.id,
+        endpoint=_ENDPOINT,
+        completion_window="24h",
+    )
+    LOG.debug("Submitted batch job %s with %s requests", batch.id, len(requests))
+
+    try:
+        status = None
+        while batch.status not in _DONE:
+            if batch.status != status:
+                status = batch.status
+                print(styled(f"  Batch job {batch.id}: {status} …", DIM))
+            await asyncio.sleep(poll_interval)
+            batch = await call_with_retries(client.batches.retrieve, batch.id)
+    except BaseException:
+        await _cancel(client, batch.id)
+        raise
+
+    if batch.status != "completed":
+        # Expired or failed jobs can still have finished part of the work
+        print(styled(f"  Batch job {batch.id} ended with status '{batch.status}'", DIM))
+
+    results: dict[str, str] = {}
+    for file_id in (batch.output_file_id, getattr(batch, "error_file_id", None)):
+        if file_id:
+            output = await call_with_retries(client.files.content, file_id)
+            _parse_output(output.text, results)
+    return results
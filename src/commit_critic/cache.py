@@ -0,0 +1,69 @@
+import os
+import sqlite3
+import time
+from .config import LOG, cache_enabled
+
+# Entries older than this are dropped when the cache is opened
+MAX_AGE = 30 * 86400
+
+_conn: sqlite3.Connection | None = None
+_disabled = False
+
+
+def cache_path() -> str:
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "commit_critic", "responses.sqlite")
+
+
+def _connect() -> sqlite3.Connection | None:
+    """Open the cache database once per process; None if caching is unavailable."""
+    global _conn, _disabled
+    if _conn is not None or _disabled:
+        return _conn
+    if not cache_enabled():
+        _disabled = True
+        return None
+
+    path = cache_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _conn = sqlite3.connect(path)
+        _conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT, ts INTEGER)")
+        with _conn:
+            _conn.execute("DELETE FROM kv WHERE ts < ?", (int(time.time()) - MAX_AGE,))
+    except (OSError, sqlite3.Error) as e:
+        # A broken cache must never break the tool — just run uncached.
+        LOG.debug("Response cache disabled (%s): %s", path, e)
+        _conn = None
+        _disabled = True
+    return _conn
+
+
+def get(key: str, max_age: int = MAX_AGE) -> str | None:
+    """Cached value for *key*, unless it was stored more than *max_age* seconds ago."""
+    conn = _connect()
+    if conn is None:
+        return None
+    try:
+        row = conn.execute(
+            "SELECT value FROM kv WHERE key = ? AND ts >= ?",
+            (key, int(time.time()) - max_age),
+        ).fetchone()
+    except sqlite3.Error as e:
+        LOG.debug("Response cache read failed: %s", e)
+        return None
+    return row[0] if row else None
+
+
+def put(key: str, value: str) -> None:
+    conn = _connect()
+    if conn is None:
+        return
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, ts) VALUES (?, ?, ?)",
+                (key, value, int(time.time())),
+            )
+    except sqlite3.Error as e:
+        LOG.debug("Response cache write failed: %s", e)
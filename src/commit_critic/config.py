@@ -1,13 +1,16 @@
+import functools
 import os
 import sys
 import logging
-import dotenv
 from .ui import styled, RED, BOLD
 
 LOG = logging.getLogger("commit_critic")
 
 
+@functools.lru_cache(maxsize=1)
 def load_config():
+    """(api key, base URL, model), read once per process — a changed .env needs a restart."""
+    import dotenv  # deferred: keeps `--help` from paying for it
     dotenv.load_dotenv()
     
     # We can validate here or just return values
@@ -18,6 +21,47 @@ def load_config():
     return key, base_url, model
 
 
+def load_summary_model(default: str) -> str:
+    """Model for summarizing parts of a large diff in --write (a fast, cheap one is ideal)."""
+    return os.getenv("OPENROUTER_SUMMARY_MODEL") or default
+
+
+def prompt_cache_enabled(model: str) -> bool:
+    """Mark system prompts with ``cache_control`` for *model*.
+
+    On by default for Anthropic models, which only cache prompts that are
+    tagged explicitly; OPENROUTER_PROMPT_CACHE=1/0 forces it on or off.
+    OpenAI, DeepSeek and Gemini cache byte-identical prefixes on their own.
+    """
+    flag = os.getenv("OPENROUTER_PROMPT_CACHE", "").lower()
+    if flag in ("1", "true", "yes"):
+        return True
+    if flag in ("0", "false", "no"):
+        return False
+    return model.startswith("anthropic/")
+
+
+def cache_enabled() -> bool:
+    """Responses are cached on disk unless COMMIT_CRITIC_NO_CACHE=1."""
+    return os.getenv("COMMIT_CRITIC_NO_CACHE", "") not in ("1", "true", "yes")
+
+
+def _env_int(name: str) -> int | None:
+    value = os.getenv(name, "").strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        LOG.warning("Ignoring %s=%r (expected an integer)", name, value)
+        return None
+
+
+def load_rate_limits() -> tuple[int | None, int | None]:
+    """Client-side (requests, tokens) per-minute caps; unset means unlimited."""
+    return _env_int("OPENROUTER_RPM"), _env_int("OPENROUTER_TPM")
+
+
 def setup_logging(verbose: bool = False) -> None:
     """Enable debug logging when COMMIT_CRITIC_DEBUG=1 or --verbose."""
     level = logging.DEBUG if (verbose or os.getenv("COMMIT_CRITIC_DEBUG")) else logging.WARNING
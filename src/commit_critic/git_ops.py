@@ -1,72 +1,152 @@
+import functools
+import re
 import subprocess
 import tempfile
+from datetime import datetime, timedelta, timezone
 from .models import CommitInfo
 from .ui import styled, DIM
 
+
 def run_git(args: list[str], cwd: str | None = None) -> str:
+    # Read raw bytes and decode once as UTF-8 rather than going through the
+    # locale-dependent text mode
     result = subprocess.run(
         ["git"] + args,
-        capture_output=True, text=True, cwd=cwd,
+        capture_output=True, cwd=cwd,
         timeout=120,
     )
     if result.returncode != 0:
-        raise RuntimeError(f"git {' '.join(args)} failed:\n{result.stderr.strip()}")
-    return result.stdout.strip()
+        stderr = result.stderr.decode("utf-8", "replace").strip()
+        raise RuntimeError(f"git {' '.join(args)} failed:\n{stderr}")
+    return result.stdout.decode("utf-8", "replace").strip()
+
+
+@functools.lru_cache(maxsize=32)
+def _run_git_cached(args: tuple[str, ...], cwd: str | None = None) -> str:
+    """Memoized ``run_git`` for read-only queries; output is fixed for the life of the process."""
+    return run_git(list(args), cwd=cwd)
+
+
+def _open_repo(cwd: str | None):
+    """Open the repo at *cwd* with pygit2, or None to use the git CLI instead."""
+    try:
+        # Optional, and deferred so commands that never read history don't load libgit2
+        import pygit2
+    except ImportError:
+        return None
+    try:
+        path = pygit2.discover_repository(cwd or ".")
+        return pygit2.Repository(path) if path else None
+    except (pygit2.GitError, KeyError, ValueError):
+        return None
+
+
+def _format_git_date(sig) -> str:
+    """Format a pygit2 signature time like git's ``%ai``."""
+    tz = timezone(timedelta(minutes=sig.offset))
+    return datetime.fromtimestamp(sig.time, tz).strftime("%Y-%m-%d %H:%M:%S %z")
+
+
+def _get_commits_pygit2(n: int, cwd: str | None) -> list[CommitInfo] | None:
+    repo = _open_repo(cwd)
+    if repo is None:
+        return None
+    if repo.head_is_unborn:
+        return []
+
+    commits = []
+    import pygit2  # already loaded by _open_repo
+
+    for c in repo.walk(repo.head.target, pygit2.GIT_SORT_TIME):
+        if len(commits) >= n:
+            break
+        commits.append(CommitInfo(
+            hash=str(c.id),
+            author=c.author.name,
+            date=_format_git_date(c.author),
+            message=c.message.strip(),
+        ))
+    return commits
 
 
 def get_commits(n: int = 50, cwd: str | None = None) -> list[CommitInfo]:
     """Return last *n* commits from the repo at *cwd*."""
-    # Use null byte as separator to avoid collision
-    sep = "%x00"
-    fmt = f"%H%n%an%n%ai%n%B{sep}"
-    log = run_git(["log", f"-{n}", f"--pretty=format:{fmt}"], cwd=cwd)
+    commits = _get_commits_pygit2(n, cwd)
+    if commits is not None:
+        return commits
+
+    # \x01 between fields and \x00 between records: neither can appear in a
+    # commit message, so each record is parsed with a single split
+    fmt = "%H%x01%an%x01%ai%x01%B%x00"
+    log = _run_git_cached(("log", f"-{n}", f"--pretty=format:{fmt}"), cwd=cwd)
     commits = []
-    # Strip the final separator if present and split (git emits \x00 for %x00)
-    blocks = log.strip("\x00").split("\x00")
-    
-    for block in blocks:
-        lines = block.strip().splitlines()
-        if len(lines) < 4:
+    for record in log.split("\x00"):
+        fields = record.split("\x01", 3)
+        if len(fields) < 4:
             continue
+        h, author, date, message = fields
         commits.append(CommitInfo(
-            hash=lines[0].strip(),
-            author=lines[1].strip(),
-            date=lines[2].strip(),
-            message="\n".join(lines[3:]).strip(),
+            hash=h.strip(),
+            author=author,
+            date=date,
+            message=message.strip(),
         ))
     return commits
 
 
 def get_staged_diff(cwd: str | None = None) -> str:
+    repo = _open_repo(cwd)
+    if repo is not None and not repo.head_is_unborn:
+        return (repo.diff("HEAD", cached=True).patch or "").strip()
     return run_git(["diff", "--staged"], cwd=cwd)
 
 
-def clone_repo(url: str) -> str:
-    """Shallow-clone *url* into a temp directory; return its path."""
+def split_diff_into_hunks(diff: str) -> list[str]:
+    """Split a unified diff into one piece per file (at each ``diff --git`` header)."""
+    parts = re.split(r"^(?=diff --git )", diff, flags=re.MULTILINE)
+    return [p for p in parts if p.strip()]
+
+
+def _cleanup(path: str) -> None:
+    import shutil
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def clone_repo(url: str, depth: int = 50) -> str:
+    """Shallow-clone *url* into a temp directory; return its path.
+
+    Only the last *depth* commits are fetched, and without any trees or
+    blobs — commit messages are all ``get_commits`` reads. Servers that
+    reject shallow/filtered clones get the older full-history, blob-less clone.
+    """
     tmp = tempfile.mkdtemp(prefix="commit_critic_")
-    print(styled(f"Cloning {url} …", DIM))
-    try:
-        subprocess.run(
-            ["git", "clone", "--bare", "--filter=blob:none", url, tmp],
-            check=True, capture_output=True, text=True, timeout=300,
-        )
-        return tmp
-    except subprocess.TimeoutExpired:
-        # Clean up the partial directory
-        import shutil
-        shutil.rmtree(tmp, ignore_errors=True)
-        raise RuntimeError(f"Cloning timed out (over 5 minutes). The repository might be too large or the network is slow.")
-    except subprocess.CalledProcessError as e:
-        # Clean up the empty/partial directory
-        import shutil
-        shutil.rmtree(tmp, ignore_errors=True)
-        
-        # Parse error for better messages
-        err_msg = e.stderr.lower()
-        if "authentication failed" in err_msg or "permission denied" in err_msg:
-            raise RuntimeError(f"Authentication failed for {url}.\n"
-                               f"If this is a private repo, try cloning it manually first and run without --url.")
-        elif "repository not found" in err_msg or "could not read from remote" in err_msg:
-             raise RuntimeError(f"Repository not found or not accessible: {url}")
-        else:
-            raise RuntimeError(f"Git clone failed:\n{e.stderr.strip()}")
+    # One write: several repos may be cloned from worker threads at once
+    print(styled(f"Cloning {url} …", DIM) + "\n", end="")
+    attempts = [
+        ["git", "clone", "--bare", "--depth", str(depth), "--filter=tree:0", "--no-checkout", url, tmp],
+        ["git", "clone", "--bare", "--filter=blob:none", url, tmp],
+    ]
+    for i, cmd in enumerate(attempts):
+        try:
+            subprocess.run(cmd, check=True, capture_output=True, text=True, timeout=300)
+            return tmp
+        except subprocess.TimeoutExpired:
+            # Clean up the partial directory
+            _cleanup(tmp)
+            raise RuntimeError(f"Cloning timed out (over 5 minutes). The repository might be too large or the network is slow.")
+        except subprocess.CalledProcessError as e:
+            # Clean up the empty/partial directory
+            _cleanup(tmp)
+
+            # Parse error for better messages
+            err_msg = e.stderr.lower()
+            if "authentication failed" in err_msg or "permission denied" in err_msg:
+                raise RuntimeError(f"Authentication failed for {url}.\n"
+                                   f"If this is a private repo, try cloning it manually first and run without --url.")
+            elif "repository not found" in err_msg or "could not read from remote" in err_msg:
+                raise RuntimeError(f"Repository not found or not accessible: {url}")
+            elif i + 1 < len(attempts):
+                # Shallow or filtered fetch refused — retry with the fallback flags
+                continue
+            else:
+                raise RuntimeError(f"Git clone failed:\n{e.stderr.strip()}")
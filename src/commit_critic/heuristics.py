@@ -0,0 +1,59 @@
+import re
+import unicodedata
+from .models import CommitCritique
+
+# Messages that say nothing at all — scored locally instead of asking the LLM
+_PLACEHOLDER_RE = re.compile(r"^(wip|fix|fixes|fixed|update|updates|test|tests|tmp|temp|asdf|\.+|:\w+:)\s*$",
+                             re.IGNORECASE)
+
+# Which type the improved message should most likely start with
+_SUGGESTED_TYPE = {
+    "fix": "fix", "fixes": "fix", "fixed": "fix",
+    "test": "test", "tests": "test",
+    "update": "chore", "updates": "chore",
+}
+
+# Zero-width joiner / variation selectors glue emoji sequences together
+_EMOJI_JOINERS = {"\u200d", "\ufe0e", "\ufe0f"}
+
+
+def _is_emoji_only(text: str) -> bool:
+    chars = [ch for ch in text if not ch.isspace()]
+    if not chars:
+        return False
+    return all(
+        ch in _EMOJI_JOINERS or unicodedata.category(ch) in ("So", "Sk")
+        or "\U0001F3FB" <= ch <= "\U0001F3FF"  # skin-tone modifiers
+        for ch in chars
+    )
+
+
+def quick_score(message: str, short_hash: str = "") -> CommitCritique | None:
+    """Score obviously meaningless messages without the LLM; None if the LLM should judge it."""
+    lines = message.strip().splitlines()
+    first = lines[0].strip() if lines else ""
+
+    if not first:
+        issue = "Empty commit message — there is no type, scope or description at all."
+        score = 1
+    elif _PLACEHOLDER_RE.match(first):
+        issue = (f"'{first}' is a placeholder, not a description — it has no type prefix, "
+                 "no scope and says nothing about what changed or why.")
+        score = 2
+    elif _is_emoji_only(first):
+        issue = "Emoji-only message — no type prefix and no description of the change."
+        score = 2
+    elif len(first) <= 3:
+        issue = f"'{first}' is too short to describe a change and has no `<type>: <description>` prefix."
+        score = 2
+    else:
+        return None
+
+    commit_type = _SUGGESTED_TYPE.get(first.lower(), "feat")
+    return CommitCritique(
+        hash=short_hash,
+        message=first,
+        score=score,
+        issue=issue,
+        suggestion=f"{commit_type}(<scope>): <what changed and why>",
+    )
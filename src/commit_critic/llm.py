@@ -1,12 +1,42 @@
+import asyncio
+import dataclasses
+import functools
+import hashlib
+import importlib.util
 import json
+import logging
+import re
 import sys
 import textwrap
-from openai import OpenAI
+from operator import itemgetter
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Final, Mapping
+from . import batch_api, cache, rate_limit, retry
+from .heuristics import quick_score
 from .models import CommitInfo, CommitCritique
 from .ui import styled, DIM, YELLOW, RED
-from .config import load_config, LOG
+from .config import load_config, load_summary_model, prompt_cache_enabled, LOG
+from .git_ops import split_diff_into_hunks
 
-ANALYSIS_SYSTEM = textwrap.dedent("""\
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+try:
+    # Optional: C-accelerated JSON; falls back to the stdlib below
+    import orjson
+except ImportError:
+    orjson = None
+
+# Per-commit JSON framing ({"hash":"…","message":""},) costs roughly this many tokens
+_COMMIT_OVERHEAD_TOKENS = 12
+
+# Output budget per commit in an analysis response (one critique object, echoed subject included)
+_TOKENS_PER_CRITIQUE = 200
+
+# With --batch, analyses larger than this go through the provider's Batch API
+BATCH_API_THRESHOLD = 100
+
+ANALYSIS_SYSTEM: Final = textwrap.dedent("""\
     You are a senior developer who reviews Git commit messages against the
     Conventional Commits specification.
 
@@ -72,7 +102,7 @@ ANALYSIS_SYSTEM = textwrap.dedent("""\
 
     You will receive a JSON array of commits. For EACH commit, return a JSON
     object with:
-      - hash:       the short hash (first 8 chars)
+      - hash:       the short hash (first 7 chars)
       - message:    the original commit message (first line only)
       - score:      integer 1-10
       - issue:      (if score < 7) a short explanation of what's wrong,
@@ -82,10 +112,11 @@ ANALYSIS_SYSTEM = textwrap.dedent("""\
       - praise:     (if score >= 7) why the commit message is good,
                     referencing which rules it follows well
 
-    Return ONLY a JSON array. No markdown fences, no commentary.
+    Return ONLY a JSON object of the form {"critiques": [...]} with one entry
+    per commit, in input order. No markdown fences, no commentary.
 """)
 
-WRITE_SYSTEM = textwrap.dedent("""\
+WRITE_SYSTEM: Final = textwrap.dedent("""\
     You are a senior developer helping write the perfect commit message.
     Given a `git diff --staged` output, produce a commit message following
     the Conventional Commits specification.
@@ -161,115 +192,793 @@ WRITE_SYSTEM = textwrap.dedent("""\
 """)
 
 
-def get_openrouter_client():
+HUNK_SYSTEM: Final = textwrap.dedent("""\
+    You summarize part of a large `git diff --staged` so that a later step
+    can write the commit message without seeing the full diff.
+
+    For each file in the diff, list its meaningful changes as short bullet
+    points: what changed and, when it is evident, why. Call out added,
+    removed or renamed files, public API changes, and anything that looks
+    like a breaking change. Ignore whitespace-only and formatting-only edits.
+
+    Return ONLY plain-text bullets, each prefixed with the file path.
+    No preamble, no markdown fences.
+""")
+
+# Cached critiques are only reused while the scoring prompt is unchanged
+_ANALYSIS_PROMPT_HASH = hashlib.sha256(ANALYSIS_SYSTEM.encode()).hexdigest()[:16]
+# A commit's critique stays valid for a month; a staged diff is short-lived
+_CRITIQUE_TTL = 30 * 86400
+_WRITE_TTL = 86400
+
+
+# One pooled client per process: keep-alive connections (and HTTP/2 when the
+# optional `h2` package is installed) spare a TCP+TLS handshake per request.
+# `openai` is imported lazily so `--help` and argument errors don't pay for
+# loading it. The pool is built through the SDK's own DefaultAsyncHttpxClient,
+# so we never import its HTTP library (not a declared dependency) ourselves.
+_CLIENT: "AsyncOpenAI | None" = None
+
+
+def get_openrouter_client() -> "AsyncOpenAI":
+    """Shared ``AsyncOpenAI`` client for OpenRouter.
+
+    Its pooled connections belong to the event loop that opened them, so
+    call ``close_openrouter_client()`` before that loop ends.
+    """
+    global _CLIENT
+    if _CLIENT is not None:
+        return _CLIENT
+
     key, base_url, _ = load_config()
     if not key:
         # Should have been caught by validate_config, but just in case
         sys.exit(1)
 
-    return OpenAI(
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient, Timeout
+
+    _CLIENT = AsyncOpenAI(
         base_url=base_url,
         api_key=key,
+        max_retries=0,  # retries are handled by _create_chat
+        # Generous read timeout: a non-streamed write request may think for a while
+        timeout=Timeout(300.0, connect=10.0),
+        http_client=DefaultAsyncHttpxClient(http2=importlib.util.find_spec("h2") is not None),
     )
+    return _CLIENT
 
 
-def llm_analyze(client, commits: list[CommitInfo], model: str | None = None, batch_size: int = 25) -> list[CommitCritique]:
-    """Send commits to LLM via OpenRouter in batches and return critiques."""
-    if model is None:
-        _, _, model = load_config()
-        
-    all_critiques: list[CommitCritique] = []
-    batches = [commits[i:i + batch_size] for i in range(0, len(commits), batch_size)]
+async def close_openrouter_client() -> None:
+    global _CLIENT
+    if _CLIENT is not None:
+        client, _CLIENT = _CLIENT, None
+        await client.close()
+
+
+def _dumps(obj) -> str:
+    """Compact JSON — no indentation whitespace for the model to pay tokens for."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def _loads(text: str):
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch one type
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+@functools.lru_cache(maxsize=8)
+def _encoder(model: str):
+    """tiktoken encoder for *model*, or None if the optional package is missing."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        # OpenRouter ids are "<provider>/<model>"; tiktoken knows OpenAI's bare names
+        return tiktoken.encoding_for_model(model.rsplit("/", 1)[-1])
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+@functools.lru_cache(maxsize=4096)
+def _count_tokens(text: str, model: str = "") -> int:
+    """Token count of *text* — exact with tiktoken, ~4 chars/token otherwise."""
+    enc = _encoder(model)
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def _pack_batches(commits: list[CommitInfo], model: str, token_budget: int,
+                  max_commits: int) -> list[list[CommitInfo]]:
+    """Greedily pack commits into batches of at most *token_budget* input tokens.
+
+    Sizing by tokens rather than a fixed count keeps every request near the
+    same latency: many short messages share a batch, a few long ones don't.
+    """
+    batches: list[list[CommitInfo]] = []
+    batch: list[CommitInfo] = []
+    running = 0
+    for c in commits:
+        tokens = _count_tokens(_subject(c.message), model) + _COMMIT_OVERHEAD_TOKENS
+        if batch and (running + tokens > token_budget or len(batch) >= max_commits):
+            batches.append(batch)
+            batch, running = [], 0
+        batch.append(c)
+        running += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _estimate_tokens(request: dict) -> int:
+    """Tokens a request counts against TPM: its prompt plus the reserved ``max_tokens``."""
+    model = request["model"]
+    prompt = 0
+    for message in request["messages"]:
+        content = message["content"]
+        if isinstance(content, str):
+            prompt += _count_tokens(content, model)
+        else:
+            prompt += sum(_count_tokens(part.get("text", ""), model) for part in content)
+    return prompt + request.get("max_tokens", 0)
+
+
+async def _create_chat(client, **kwargs):
+    """``chat.completions.create`` paced by the rate limiter and retried on transient errors."""
+    estimated_tokens = _estimate_tokens(kwargs)
+    return await retry.call_with_retries(
+        client.chat.completions.create,
+        pace=functools.partial(rate_limit.throttle, estimated_tokens),
+        **kwargs,
+    )
+
+
+def _cache_key(model: str, system: str, user: str) -> str:
+    return hashlib.sha256((model + system + user).encode()).hexdigest()
 
-    for idx, batch in enumerate(batches):
-        if len(batches) > 1:
-            print(styled(f"  Analyzing batch {idx + 1}/{len(batches)} …", DIM))
 
-        payload = json.dumps([
-            {"hash": c.hash[:8], "message": c.message}
-            for c in batch
-        ], indent=2)
+def _critique_key(model: str, commit_hash: str) -> str:
+    """Cache key for one commit's critique: (commit, scoring prompt, model)."""
+    return f"critique:{commit_hash}:{_ANALYSIS_PROMPT_HASH}:{model}"
 
-        LOG.debug("LLM request batch %s: payload=%s", idx + 1, payload)
 
+def _cached_critique(model: str, commit_hash: str) -> CommitCritique | None:
+    text = cache.get(_critique_key(model, commit_hash), max_age=_CRITIQUE_TTL)
+    if text is None:
+        return None
+    try:
+        return _critique_from_item(_loads(text))
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return None
+
+
+def _store_critique(model: str, commit_hash: str, critique: CommitCritique) -> None:
+    cache.put(_critique_key(model, commit_hash), _dumps(dataclasses.asdict(critique)))
+
+
+_OPEN_RE = re.compile(r"[{\[]")
+_DECODER = json.JSONDecoder()
+
+
+class _ObjectStream:
+    """Incrementally pull complete array elements ``{...}`` out of streamed JSON.
+
+    The model answers ``{"critiques": [{...}, ...]}`` (a bare array works
+    too), and each element is returned as soon as its closing brace arrives,
+    while the rest of the array is still being written. A malformed element
+    only costs that element: the scan resumes after its closing brace. Call
+    ``finish`` once the stream ends to recover whatever follows an element
+    that never closed (e.g. one with a stray unescaped quote).
+    """
+
+    def __init__(self) -> None:
+        self._buf = ""
+        self._pos = 0
+        self._stack: list[str] = []  # open containers, innermost last
+        self._start = -1  # offset of the element being read, or -1
+        self._start_depth = 0
+        self._in_str = False
+        self._escape = False
+        self.kept = 0
+        self.dropped = 0
+
+    def feed(self, text: str) -> list[dict]:
+        buf = self._buf + text
+        i, n = self._pos, len(buf)
+        stack = self._stack
+        objs = []
+        while i < n:
+            if not stack:
+                # Outside any JSON value: skip to the next opener
+                m = _OPEN_RE.search(buf, i)
+                if m is None:
+                    i = n
+                    break
+                i = m.start()
+            ch = buf[i]
+            if self._in_str:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_str = False
+            elif ch == '"':
+                self._in_str = True
+            elif ch == "{" or ch == "[":
+                if ch == "{" and self._start < 0 and stack and stack[-1] == "[":
+                    self._start, self._start_depth = i, len(stack)
+                stack.append(ch)
+            elif ch == "}" or ch == "]":
+                if stack:
+                    stack.pop()
+                if self._start >= 0 and len(stack) == self._start_depth:
+                    fragment = buf[self._start:i + 1]
+                    try:
+                        objs.append(_loads(fragment))
+                    except json.JSONDecodeError:
+                        self.dropped += 1
+                        if LOG.isEnabledFor(logging.DEBUG):
+                            LOG.debug("Skipping malformed object in LLM response: %s", fragment[:200])
+                    self._start = -1
+            i += 1
+
+        # Keep only the unfinished element (if any) for the next chunk
+        if self._start >= 0:
+            self._buf, self._pos, self._start = buf[self._start:], i - self._start, 0
+        else:
+            self._buf, self._pos = "", 0
+        self.kept += len(objs)
+        return objs
+
+    def finish(self) -> list[dict]:
+        """Objects after an element that never closed, recovered with ``raw_decode``."""
+        objs: list[dict] = []
+        if self._start >= 0:
+            self.dropped += 1
+            text = self._buf
+            pos = text.find("{", self._start + 1)
+            while pos != -1:
+                try:
+                    obj, pos = _DECODER.raw_decode(text, pos)
+                    if isinstance(obj, dict):
+                        objs.append(obj)
+                except json.JSONDecodeError:
+                    self.dropped += 1
+                    pos += 1
+                pos = text.find("{", pos)
+            self._buf, self._pos, self._start = "", 0, -1
+        self.kept += len(objs)
+        if self.dropped:
+            LOG.debug("Skipped %s malformed fragment(s) in LLM response; kept %s object(s)",
+                      self.dropped, self.kept)
+        return objs
+
+
+def extract_json_objects(text: str) -> list[dict]:
+    """Every well-formed array element ``{...}`` in a finished response."""
+    parser = _ObjectStream()
+    return parser.feed(text) + parser.finish()
+
+
+_CRITIQUE_DEFAULTS = {"hash": "", "message": "", "score": 0, "issue": "", "suggestion": "", "praise": ""}
+_critique_fields = itemgetter("hash", "message", "score", "issue", "suggestion", "praise")
+
+
+def _critique_from_item(item: dict) -> CommitCritique:
+    h, m, score, issue, suggestion, praise = _critique_fields({**_CRITIQUE_DEFAULTS, **item})
+    critique = CommitCritique(h or "", m or "", int(score or 0), issue or "", suggestion or "", praise or "")
+    if LOG.isEnabledFor(logging.DEBUG):
+        LOG.debug("Parsed critique: hash=%r message=%r score=%s", h, m, critique.score)
+    return critique
+
+
+def _critiques_from_items(items: list[dict]) -> list[CommitCritique]:
+    """Critiques for *items*, skipping any with unusable fields (e.g. a score of "8/10")."""
+    critiques = []
+    for item in items:
         try:
-            resp = client.chat.completions.create(
-                model=model,
-                max_tokens=10000,
-                messages=[
-                    {"role": "system", "content": ANALYSIS_SYSTEM},
-                    {"role": "user", "content": payload},
-                ],
+            critiques.append(_critique_from_item(item))
+        except (TypeError, ValueError) as e:
+            LOG.debug("Skipping critique with invalid fields %r: %s", item, e)
+    return critiques
+
+
+def _build_system_message(text: str, cacheable: bool) -> Mapping:
+    if not cacheable:
+        return MappingProxyType({"role": "system", "content": text})
+    return MappingProxyType({
+        "role": "system",
+        "content": [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}],
+    })
+
+
+# Built once and shared read-only by every request; only the user message varies per call
+_SYSTEM_MESSAGES: Final = {
+    (text, cacheable): _build_system_message(text, cacheable)
+    for text in (ANALYSIS_SYSTEM, WRITE_SYSTEM, HUNK_SYSTEM)
+    for cacheable in (False, True)
+}
+
+
+def _system_message(text: str, model: str) -> Mapping:
+    """System message for *text*; tagged for provider-side prompt caching when enabled.
+
+    The big static prompts are identical on every call, so providers that
+    honour ``cache_control`` (Anthropic, Gemini via OpenRouter) bill the
+    cached prefix at a fraction of the input price and skip re-processing it.
+    The system message must stay first and never be interpolated with
+    per-request data, or the prefix stops matching.
+    """
+    return _SYSTEM_MESSAGES[text, prompt_cache_enabled(model)]
+
+
+def _subject(message: str) -> str:
+    """First line of *message*, capped at 200 chars.
+
+    Only the subject line is reviewed, so bodies are never sent to the model.
+    """
+    lines = message.strip().splitlines()
+    return lines[0][:200] if lines else ""
+
+
+def _batch_payload(batch: list[CommitInfo]) -> str:
+    return _dumps([
+        {"hash": c.hash[:7], "message": _subject(c.message)}
+        for c in batch
+    ])
+
+
+def _analysis_request(model: str, payload: str, n_commits: int) -> dict:
+    """``chat.completions.create`` arguments for one analysis batch."""
+    return {
+        "model": model,
+        # Sized to the batch: reserved output tokens count against TPM limits too
+        # (with headroom for models that reason before answering)
+        "max_tokens": min(10000, n_commits * _TOKENS_PER_CRITIQUE + 1000),
+        "response_format": {"type": "json_object"},
+        "messages": [
+            _system_message(ANALYSIS_SYSTEM, model),
+            {"role": "user", "content": payload},
+        ],
+    }
+
+
+def _parse_critiques(text: str, on_critique=None) -> list[CommitCritique]:
+    """Critiques from a complete response (cache hit or Batch API output)."""
+    critiques = _critiques_from_items(extract_json_objects(text))
+    if on_critique:
+        for critique in critiques:
+            on_critique(critique)
+    return critiques
+
+
+def _uncovered(batch: list[CommitInfo], critiques: list[CommitCritique]) -> list[CommitInfo]:
+    """Commits in *batch* the response has no critique for (cut off, or skipped by the model)."""
+    covered = {c.hash for c in critiques}
+    return [c for c in batch if c.hash[:7] not in covered]
+
+
+async def _analyze_batch(client, batch: list[CommitInfo], model: str, sem: asyncio.Semaphore,
+                         idx: int, total: int, on_critique=None, label: str = "",
+                         resend: bool = True) -> list[CommitCritique]:
+    """Critique a single batch of commits, streaming the response.
+
+    Each critique is passed to *on_critique* as soon as its JSON object is
+    complete. Commits the response left out (e.g. it hit ``max_tokens``)
+    are sent once more on their own if *resend* is set. Returns whatever
+    was parsed ([] if the batch failed outright).
+    """
+    payload = _batch_payload(batch)
+    parser = _ObjectStream()
+    critiques: list[CommitCritique] = []
+
+    def consume(items: list[dict]) -> None:
+        for critique in _critiques_from_items(items):
+            critiques.append(critique)
+            if on_critique:
+                on_critique(critique)
+
+    async with sem:
+        if total > 1:
+            print(styled(f"  {label}Analyzing batch {idx + 1}/{total} …", DIM))
+
+        debug = LOG.isEnabledFor(logging.DEBUG)
+        if debug:
+            LOG.debug("LLM request batch %s: payload=%s", idx + 1, payload)
+
+        # The raw text is only kept for the debug log; critiques are parsed as it streams
+        parts: list[str] = []
+        finish_reason = None
+        try:
+            stream = await _create_chat(
+                client,
+                stream=True,
+                **_analysis_request(model, payload, len(batch)),
             )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                finish_reason = getattr(chunk.choices[0], "finish_reason", None) or finish_reason
+                delta = chunk.choices[0].delta.content or ""
+                if debug:
+                    parts.append(delta)
+                consume(parser.feed(delta))
         except Exception as e:
-            print(styled(f"  Error calling AI API: {e}", RED))
-            continue
+            print(styled(f"  {label}Error calling AI API: {e}", RED))
+            return critiques
+    consume(parser.finish())
 
-        text = resp.choices[0].message.content.strip()
+    if debug:
+        text = "".join(parts).strip()
         LOG.debug("LLM response batch %s (raw): %s", idx + 1, text[:2000] + ("..." if len(text) > 2000 else ""))
 
-        # Robustly parse — strip markdown fences if present
-        if text.startswith("```"):
-            text = "\n".join(text.splitlines()[1:])
-        if text.endswith("```"):
-            text = "\n".join(text.splitlines()[:-1])
+    missing = _uncovered(batch, critiques)
+    if missing and resend:
+        LOG.debug("Batch %s: no critique for %s of %s commits (finish_reason=%s); re-sending them",
+                  idx + 1, len(missing), len(batch), finish_reason)
+        # Cut off before the first critique: a smaller request has a better chance
+        if finish_reason == "length" and not critiques and len(missing) > 1:
+            halves = [missing[:len(missing) // 2], missing[len(missing) // 2:]]
+        else:
+            halves = [missing]
+        for part in halves:
+            critiques += await _analyze_batch(client, part, model, sem, idx, 1, on_critique, label, resend=False)
+    elif not critiques and resend:
+        # (a re-send that also failed is covered by llm_analyze's missing-commit count)
+        print(styled(f"  {label}Warning: could not parse LLM response for a batch. Skipping.", YELLOW))
+    return critiques
+
+
+async def _analyze_via_batch_api(client, batches: list[list[CommitInfo]], model: str,
+                                 sem: asyncio.Semaphore, on_critique=None,
+                                 label: str = "") -> list[list[CommitCritique]]:
+    """Critique all *batches* in a single Batch API job.
+
+    Batches the job returned nothing for (the provider has no Batch API, the
+    job failed, or single requests errored) are sent as streamed requests instead.
+    """
+    pending = {
+        f"batch-{idx}": _analysis_request(model, _batch_payload(batch), len(batch))
+        for idx, batch in enumerate(batches)
+    }
+    print(styled(f"  {label}Submitting {len(pending)} requests to the Batch API (this can take a while) …", DIM))
+    try:
+        responses = await batch_api.run_batch(client, pending)
+    except Exception as e:
+        print(styled(f"  {label}Error running batch job: {e}", RED))
+        responses = {}
+
+    # (batch index, commits still without a critique): whole batches the job
+    # returned nothing for, and commits a response left out (e.g. cut off at max_tokens)
+    results: list[list[CommitCritique]] = []
+    missing: list[tuple[int, list[CommitInfo]]] = []
+    for idx, (custom_id, batch) in enumerate(zip(pending, batches)):
+        text = responses.get(custom_id)
+        critiques = [] if text is None else _parse_critiques(text, on_critique)
+        results.append(critiques)
+        uncovered = _uncovered(batch, critiques)
+        if uncovered:
+            missing.append((idx, uncovered))
+
+    if missing:
+        print(styled(f"  {label}Sending {len(missing)} batches without the Batch API …", DIM))
+        retried = await asyncio.gather(*[
+            _analyze_batch(client, commits, model, sem, n, len(missing), on_critique, label)
+            for n, (_, commits) in enumerate(missing)
+        ], return_exceptions=True)
+        for (idx, _), result in zip(missing, retried):
+            if isinstance(result, BaseException):
+                print(styled(f"  {label}Error analyzing batch: {result}", RED))
+            else:
+                results[idx] += result
+    return results
+
+
+def _in_commit_order(critiques: list[CommitCritique], commits: list[CommitInfo]) -> list[CommitCritique]:
+    """Local, cached and deduplicated critiques are collected out of order; restore commit order."""
+    order = {c.hash[:7]: idx for idx, c in enumerate(commits)}
+    critiques.sort(key=lambda c: order.get(c.hash, len(order)))
+    return critiques
+
+
+async def llm_analyze(client, commits: list[CommitInfo], model: str | None = None, batch_size: int = 50,
+                      token_budget: int = 2000, concurrency: int = 8, use_batch_api: bool = False,
+                      on_critique=None, sem: asyncio.Semaphore | None = None,
+                      label: str = "") -> list[CommitCritique]:
+    """Send commits to LLM via OpenRouter in concurrent batches and return critiques.
+
+    *client* is the ``AsyncOpenAI`` from ``get_openrouter_client``.
+    Batches hold up to *batch_size* commits and roughly *token_budget* input
+    tokens; at most *concurrency* batch requests are in flight at once. Responses are
+    streamed; *on_critique*, if given, is called with each critique as soon
+    as it has been parsed. With *use_batch_api*, jobs over
+    ``BATCH_API_THRESHOLD`` commits are submitted as one Batch API job instead.
+    Concurrent calls (one per repository) can share one *sem* so the cap
+    applies across all of them; *label* prefixes their progress lines.
+    """
+    if model is None:
+        _, _, model = load_config()
 
-        try:
-            items = json.loads(text)
-        except json.JSONDecodeError:
-            print(styled("  Warning: could not parse LLM response for a batch. Skipping.", YELLOW))
+    # Placeholder messages ("wip", "fix", emoji-only, …) are scored locally
+    cheap: list[CommitCritique] = []
+    remaining: list[CommitInfo] = []
+    for c in commits:
+        critique = quick_score(c.message, c.hash[:7])
+        if critique is None:
+            remaining.append(c)
+        else:
+            cheap.append(critique)
+            if on_critique:
+                on_critique(critique)
+    if cheap:
+        LOG.debug("Scored %s trivial commits locally", len(cheap))
+
+    # Commits critiqued on an earlier run (same prompt and model) are reused
+    uncached: list[CommitInfo] = []
+    for c in remaining:
+        critique = _cached_critique(model, c.hash)
+        if critique is None:
+            uncached.append(c)
+        else:
+            cheap.append(critique)
+            if on_critique:
+                on_critique(critique)
+    if len(uncached) < len(remaining):
+        LOG.debug("Reused %s cached critiques", len(remaining) - len(uncached))
+    if not uncached:
+        return _in_commit_order(cheap, commits)
+    full_hashes = {c.hash[:7]: c.hash for c in uncached}
+
+    # Identical messages only need to be critiqued once
+    groups: dict[str, list[CommitInfo]] = {}
+    for c in uncached:
+        groups.setdefault(_subject(c.message), []).append(c)
+    reps = [group[0] for group in groups.values()]
+    members_by_hash = {group[0].hash[:7]: group for group in groups.values()}
+    if len(reps) < len(uncached):
+        LOG.debug("Deduplicated %s commits into %s unique messages", len(uncached), len(reps))
+
+    def fan_out(critique: CommitCritique) -> list[CommitCritique]:
+        group = members_by_hash.get(critique.hash) or groups.get(_subject(critique.message))
+        if not group:
+            return [critique]
+        return [
+            CommitCritique(
+                hash=member.hash[:7],
+                message=critique.message,
+                score=critique.score,
+                issue=critique.issue,
+                suggestion=critique.suggestion,
+                praise=critique.praise,
+            )
+            for member in group
+        ]
+
+    def emit(critique: CommitCritique) -> None:
+        for c in fan_out(critique):
+            on_critique(c)
+
+    batches = _pack_batches(reps, model, token_budget, batch_size)
+    if sem is None:
+        sem = asyncio.Semaphore(concurrency)
+    if use_batch_api and len(uncached) > BATCH_API_THRESHOLD:
+        results = await _analyze_via_batch_api(client, batches, model, sem, emit if on_critique else None, label)
+    else:
+        tasks = [
+            _analyze_batch(client, batch, model, sem, idx, len(batches), emit if on_critique else None, label)
+            for idx, batch in enumerate(batches)
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    all_critiques: list[CommitCritique] = cheap
+    for result in results:
+        if isinstance(result, BaseException):
+            print(styled(f"  {label}Error analyzing batch: {result}", RED))
             continue
+        for critique in result:
+            for c in fan_out(critique):
+                all_critiques.append(c)
+                if c.hash in full_hashes:
+                    _store_critique(model, full_hashes[c.hash], c)
+
+    lost = len(_uncovered(commits, all_critiques))
+    if lost:
+        print(styled(f"  {label}Warning: the AI returned no critique for {lost} commit(s); "
+                     "they are missing from the report.", YELLOW))
+    return _in_commit_order(all_critiques, commits)
+
+
+# Diffs smaller than this are sent whole; larger ones are summarized per part first
+_MAP_REDUCE_MIN_CHARS = 8_000
+# Upper bound on the diff text in a single summary request
+_SUMMARY_CHUNK_CHARS = 24_000
+
+
+def _split_file_diff(file_diff: str, max_chars: int) -> list[str]:
+    """Split one file's diff at its ``@@`` hunk headers, repeating the file header on each piece."""
+    lines = file_diff.splitlines(keepends=True)
+    first_hunk = next((i for i, line in enumerate(lines) if line.startswith("@@")), len(lines))
+    header, body = "".join(lines[:first_hunk]), lines[first_hunk:]
+
+    hunks: list[str] = []
+    for line in body:
+        if line.startswith("@@") or not hunks:
+            hunks.append(line)
+        else:
+            hunks[-1] += line
+
+    budget = max(1, max_chars - len(header))
+    pieces, current = [], ""
+    for hunk in hunks:
+        # A single enormous hunk (e.g. a generated file) is split by line, and
+        # an enormous line by length, so nothing is dropped
+        parts = [hunk] if len(hunk) <= budget else _split_lines(hunk, budget)
+        for part in parts:
+            if current and len(current) + len(part) > budget:
+                pieces.append(header + current)
+                current = ""
+            current += part
+    if current or not pieces:
+        pieces.append(header + current)
+    return pieces
+
+
+def _split_lines(text: str, max_chars: int) -> list[str]:
+    """Split *text* into runs of whole lines of at most *max_chars*; longer lines are cut."""
+    parts, current = [], ""
+    for line in text.splitlines(keepends=True):
+        for start in range(0, len(line), max_chars):
+            segment = line[start:start + max_chars]
+            if current and len(current) + len(segment) > max_chars:
+                parts.append(current)
+                current = ""
+            current += segment
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _diff_chunks(diff: str, max_chars: int = _SUMMARY_CHUNK_CHARS) -> list[str]:
+    """Pack per-file diffs into chunks of at most *max_chars*, splitting oversized files by hunk."""
+    chunks, current = [], ""
+    for file_diff in split_diff_into_hunks(diff):
+        pieces = [file_diff] if len(file_diff) <= max_chars else _split_file_diff(file_diff, max_chars)
+        for piece in pieces:
+            if current and len(current) + len(piece) > max_chars:
+                chunks.append(current)
+                current = ""
+            current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def _summarize_hunk(client, hunk: str, model: str, sem: asyncio.Semaphore) -> str:
+    """Map step: summarize one chunk of the diff as plain-text bullets."""
+    user_msg = f"```\n{hunk}\n```"
+    key = _cache_key(model, HUNK_SYSTEM, user_msg)
+    text = cache.get(key, max_age=_WRITE_TTL)
+    if text is not None:
+        return text
+
+    async with sem:
+        resp = await _create_chat(
+            client,
+            model=model,
+            max_tokens=1000,
+            messages=[
+                _system_message(HUNK_SYSTEM, model),
+                {"role": "user", "content": user_msg},
+            ],
+        )
+    text = (resp.choices[0].message.content or "").strip()
+    if text:
+        cache.put(key, text)
+    return text
+
+
+def _parse_write_response(text: str) -> dict | None:
+    """The suggestion object from a write response; None unless it has a string ``summary``.
+
+    OpenRouter drops ``response_format`` for providers without JSON mode
+    (Anthropic among them), so the object may still arrive wrapped in a
+    markdown fence or a sentence: only the outermost ``{...}`` is parsed.
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        return None
+    try:
+        data = _loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("summary"), str):
+        return None
+    return data
 
-        for item in items:
-            critique = CommitCritique(
-                hash=item.get("hash", ""),
-                message=item.get("message", ""),
-                score=int(item.get("score", 0)),
-                issue=item.get("issue", ""),
-                suggestion=item.get("suggestion", ""),
-                praise=item.get("praise", ""),
-            )
-            LOG.debug("Parsed critique: hash=%r message=%r score=%s", critique.hash, critique.message, critique.score)
-            all_critiques.append(critique)
 
-    return all_critiques
+# The "summary" string of a partially streamed write response, once its closing quote is in
+_SUMMARY_RE = re.compile(r'"summary"\s*:\s*("(?:[^"\\]|\\.)*")')
 
 
-def llm_write(client, diff: str, model: str | None = None) -> dict:
-    """Ask LLM via OpenRouter to suggest a commit message based on staged diff."""
+async def llm_write(client, diff: str, model: str | None = None, concurrency: int = 8,
+                    on_summary=None) -> dict:
+    """Ask LLM via OpenRouter to suggest a commit message based on staged diff.
+
+    *client* must be an ``AsyncOpenAI`` instance. Large diffs are not
+    truncated: each part is summarized concurrently (map) and the commit
+    message is written from those summaries (reduce). The response is
+    streamed; *on_summary*, if given, is called with the summary line as
+    soon as it is complete, before the body has been written.
+    """
     if model is None:
         _, _, model = load_config()
-        
-    # Truncate very large diffs to stay within context limits
-    max_diff_chars = 100_000
-    if len(diff) > max_diff_chars:
-        print(styled(f"  Warning: Diff is too large ({len(diff)} chars). Truncating to {max_diff_chars} chars.", YELLOW))
-        diff = diff[:max_diff_chars] + "\n\n... [diff truncated] ..."
 
-    user_msg = f"Here is the `git diff --staged`:\n```\n{diff}\n```"
+    # Keyed on the raw diff, so an unchanged staging area skips the map step too
+    key = _cache_key(model, WRITE_SYSTEM, diff)
+    text = cache.get(key, max_age=_WRITE_TTL)
+    if text is not None:
+        data = _parse_write_response(text)
+        if data is not None:
+            return data
+
+    if len(diff) < _MAP_REDUCE_MIN_CHARS:
+        user_msg = f"Here is the `git diff --staged`:\n```\n{diff}\n```"
+    else:
+        chunks = _diff_chunks(diff)
+        print(styled(f"  Large diff ({len(diff)} chars): summarizing {len(chunks)} parts first …", DIM))
+        summary_model = load_summary_model(model)
+        sem = asyncio.Semaphore(concurrency)
+        try:
+            summaries = await asyncio.gather(*[_summarize_hunk(client, c, summary_model, sem) for c in chunks])
+        except Exception as e:
+            print(styled(f"Error calling AI API: {e}", RED))
+            sys.exit(1)
+        user_msg = (
+            "The `git diff --staged` is too large to show in full. "
+            "Here are summaries of each part of it:\n\n" + "\n\n".join(summaries)
+        )
 
+    parts: list[str] = []
+    announced = on_summary is None
     try:
-        resp = client.chat.completions.create(
+        stream = await _create_chat(
+            client,
+            stream=True,
             model=model,
-            max_tokens=6000,
+            max_tokens=min(6000, max(800, len(diff) // 40)),
+            response_format={"type": "json_object"},
             messages=[
-                {"role": "system", "content": WRITE_SYSTEM},
+                _system_message(WRITE_SYSTEM, model),
                 {"role": "user", "content": user_msg},
             ],
         )
-        text = resp.choices[0].message.content.strip()
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            parts.append(chunk.choices[0].delta.content or "")
+            if not announced:
+                m = _SUMMARY_RE.search("".join(parts))
+                if m:
+                    announced = True
+                    try:
+                        on_summary(_loads(m.group(1)))
+                    except json.JSONDecodeError:
+                        pass
     except Exception as e:
         # For write mode, failing is critical, so we exit or return empty
         print(styled(f"Error calling AI API: {e}", RED))
         sys.exit(1)
+    text = "".join(parts)
 
-    if text.startswith("```"):
-        text = "\n".join(text.splitlines()[1:])
-    if text.endswith("```"):
-        text = "\n".join(text.splitlines()[:-1])
-
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
+    data = _parse_write_response(text)
+    if data is None:
         print(styled("Error: AI returned invalid JSON. Try again.", RED))
         sys.exit(1)
+    # Only a usable suggestion is cached, or a bad one would be replayed on every retry
+    cache.put(key, text)
+    return data
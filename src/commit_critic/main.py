@@ -1,60 +1,120 @@
 import argparse
+import asyncio
+import functools
 import sys
 import shutil
 import textwrap
 
 from .config import validate_config, load_config, setup_logging
 from .git_ops import get_commits, clone_repo, get_staged_diff, run_git
-from .llm import get_openrouter_client, llm_analyze, llm_write
 from .models import RepoStats
-from .ui import styled, print_analysis, print_write_suggestion, BOLD, YELLOW, DIM, RED, GREEN
+from .ui import (styled, print_analysis, print_critique_progress, print_summary_preview,
+                 print_write_suggestion, BOLD, YELLOW, DIM, RED, GREEN)
 
 
-def cmd_analyze(args) -> None:
-    client = get_openrouter_client()
+async def _fetch_commits(url: str | None, num: int) -> tuple[str | None, list]:
+    """Clone *url* (if given) and read its last *num* commits; returns (temp dir or None, commits)."""
     tmp_dir: str | None = None
-    cwd: str | None = None
+    if url:
+        tmp_dir = await asyncio.to_thread(clone_repo, url, depth=num)
+    try:
+        commits = await asyncio.to_thread(get_commits, num, cwd=tmp_dir)
+    except BaseException:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return tmp_dir, commits
+
+
+def _repo_stats(critiques: list) -> RepoStats:
+    """Aggregate the critiques in a single pass."""
+    score_sum = vague = decent = one_word = good = 0
+    for c in critiques:
+        score = c.score
+        score_sum += score
+        if score < 5:
+            vague += 1
+        elif score < 7:
+            decent += 1
+        else:
+            good += 1
+        if len(c.message.split()) <= 1:
+            one_word += 1
+    total = len(critiques)
+    return RepoStats(
+        total=total,
+        avg_score=score_sum / total if total else 0,
+        vague_count=vague,
+        decent_count=decent,
+        one_word_count=one_word,
+        good_count=good,
+        critiques=critiques,
+    )
+
+
+async def _analyze_repo(url: str | None, args, client_task, sem: asyncio.Semaphore,
+                        label: str = "") -> list | None:
+    """Fetch and critique one repository (the current one if *url* is None); None if there is nothing to report."""
+    from .llm import llm_analyze
 
     try:
-        if args.url:
-            try:
-                tmp_dir = clone_repo(args.url)
-                cwd = tmp_dir
-            except RuntimeError as e:
-                print(styled("Error: ", RED, BOLD) + str(e))
-                return
-
-        n = args.num
-        print(styled(f"\nAnalyzing last {n} commits…\n", BOLD))
-        commits = get_commits(n, cwd=cwd)
+        tmp_dir, commits = await _fetch_commits(url, args.num)
+    except RuntimeError as e:
+        print(styled("Error: ", RED, BOLD) + label + str(e))
+        return None
 
+    try:
         if not commits:
-            print(styled("No commits found.", YELLOW))
-            return
-
-        print(styled(f"  Found {len(commits)} commits. Sending to AI for review…", DIM))
-        critiques = llm_analyze(client, commits)
-
-        stats = RepoStats(
-            total=len(critiques),
-            avg_score=sum(c.score for c in critiques) / len(critiques) if critiques else 0,
-            vague_count=sum(1 for c in critiques if c.score < 5),
-            decent_count=sum(1 for c in critiques if 5 <= c.score < 7),
-            one_word_count=sum(1 for c in critiques if len(c.message.split()) <= 1),
-            good_count=sum(1 for c in critiques if c.score >= 7),
-            critiques=critiques,
-        )
-        print_analysis(stats)
+            print(styled(f"{label}No commits found.", YELLOW))
+            return None
+
+        client = await client_task
+        print(styled(f"  {label}Found {len(commits)} commits. Sending to AI for review…", DIM))
+        return await llm_analyze(client, commits, use_batch_api=args.batch,
+                                 on_critique=functools.partial(print_critique_progress, label=label),
+                                 sem=sem, label=label)
     finally:
         if tmp_dir:
             shutil.rmtree(tmp_dir, ignore_errors=True)
 
 
-def cmd_write(args) -> None:
-    client = get_openrouter_client()
+async def cmd_analyze(args) -> None:
+    from .llm import get_openrouter_client
+
+    n = args.num
+    urls = args.url or [None]
+    if len(urls) > 1:
+        print(styled(f"\nAnalyzing last {n} commits in {len(urls)} repositories…\n", BOLD))
+    else:
+        print(styled(f"\nAnalyzing last {n} commits…\n", BOLD))
+
+    # Git I/O (clone + log) for every repo runs alongside building the API client,
+    # and one repo's clone overlaps with another's LLM calls
+    client_task = asyncio.ensure_future(asyncio.to_thread(get_openrouter_client))
+    # One cap on in-flight LLM requests shared by all repos (llm_analyze's default of 8)
+    sem = asyncio.Semaphore(8)
+    results = await asyncio.gather(*[
+        _analyze_repo(url, args, client_task, sem, f"{url}: " if len(urls) > 1 else "")
+        for url in urls
+    ])
+    await client_task  # even if every repo failed, so amain can close the client
+
+    for url, critiques in zip(urls, results):
+        if critiques is None:
+            continue
+        if len(urls) > 1:
+            print(styled(f"\n{url}", BOLD))
+        print_analysis(_repo_stats(critiques))
+
+
+async def cmd_write(args) -> None:
+    from .llm import get_openrouter_client, llm_write
 
     try:
-        diff = get_staged_diff()
+        client, diff = await asyncio.gather(
+            asyncio.to_thread(get_openrouter_client),
+            asyncio.to_thread(get_staged_diff),
+        )
     except RuntimeError:
         print(styled("Error: ", RED, BOLD) + "Not inside a Git repository or git is not available.")
         sys.exit(1)
@@ -64,7 +124,9 @@ def cmd_write(args) -> None:
         print("Stage some files first:  git add <files>")
         sys.exit(1)
 
-    data = llm_write(client, diff)
+    print()
+    print(styled("Analyzing staged changes…", DIM))
+    data = await llm_write(client, diff, on_summary=print_summary_preview)
     print_write_suggestion(data)
 
     # Interactive accept / edit loop
@@ -88,10 +150,21 @@ def cmd_write(args) -> None:
         print(styled(f"\nCommit failed: {e}", RED))
 
 
-def main() -> None:
-    # Validate env vars before doing anything
-    validate_config()
+async def amain(args) -> None:
+    """Run the selected command on one event loop, then release the shared API client."""
+    # Imported here rather than at module level so --help and usage errors stay instant
+    from .llm import close_openrouter_client
+
+    try:
+        if args.analyze:
+            await cmd_analyze(args)
+        else:
+            await cmd_write(args)
+    finally:
+        await close_openrouter_client()
 
+
+def main() -> None:
     parser = argparse.ArgumentParser(
         description="AI Commit Message Critic — analyze & improve your Git commits",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -100,6 +173,7 @@ def main() -> None:
               %(prog)s --analyze                   Review last 50 commits (current repo)
               %(prog)s --analyze -n 100            Review last 100 commits
               %(prog)s --analyze --url=<repo_url>  Review a remote repository
+              %(prog)s --analyze --url <a> <b>     Review several repositories at once
               %(prog)s --write                     Suggest a commit for staged changes
         """),
     )
@@ -107,23 +181,29 @@ def main() -> None:
     group.add_argument("--analyze", action="store_true", help="Analyze existing commit history")
     group.add_argument("--write", action="store_true", help="Interactive commit message writer")
 
-    parser.add_argument("--url", type=str, default=None,
-                        help="Remote Git repo URL to analyze (used with --analyze)")
+    parser.add_argument("--url", nargs="+", default=None, metavar="URL",
+                        help="Remote Git repo URL(s) to analyze concurrently (used with --analyze)")
     parser.add_argument("-n", "--num", type=int, default=50,
                         help="Number of commits to analyze (default: 50)")
+    parser.add_argument("--batch", action="store_true",
+                        help="Use the provider's Batch API for large analyses (cheaper, but can take minutes)")
     parser.add_argument("-v", "--verbose", action="store_true",
                         help="Enable debug logs (what we send to the LLM and what we get back)")
 
     args = parser.parse_args()
-    setup_logging(verbose=args.verbose)
 
     if args.url and not args.analyze:
         parser.error("--url can only be used with --analyze")
+    if args.batch and not args.analyze:
+        parser.error("--batch can only be used with --analyze")
 
-    if args.analyze:
-        cmd_analyze(args)
-    else:
-        cmd_write(args)
+    # Validate env vars before doing any real work (but after --help / usage errors).
+    # This is the first load_config(), so it must also precede setup_logging:
+    # COMMIT_CRITIC_DEBUG may come from .env
+    validate_config()
+    setup_logging(verbose=args.verbose)
+
+    asyncio.run(amain(args))
 
 if __name__ == "__main__":
     main()
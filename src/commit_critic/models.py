@@ -1,6 +1,6 @@
 from dataclasses import dataclass, field
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CommitInfo:
     hash: str
     author: str
@@ -8,7 +8,7 @@ class CommitInfo:
     message: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CommitCritique:
     hash: str
     message: str
@@ -18,7 +18,7 @@ class CommitCritique:
     praise: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class RepoStats:
     total: int = 0
     avg_score: float = 0.0
@@ -0,0 +1,62 @@
+import asyncio
+import time
+from .config import load_rate_limits
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at *rate_per_sec*, holding at most *burst* tokens.
+
+    ``acquire`` debits the tokens immediately and then sleeps until the
+    bucket has caught up, so concurrent callers are served in arrival order
+    and a single request larger than *burst* still goes through (it just
+    waits longer).
+    """
+
+    def __init__(self, rate_per_sec: float, burst: float) -> None:
+        self.rate = rate_per_sec
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+
+    def _reserve(self, n: float) -> float:
+        """Take *n* tokens and return how many seconds the caller must wait for them."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= n
+        return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self, n: float = 1) -> None:
+        delay = self._reserve(n)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_buckets: tuple[TokenBucket | None, TokenBucket | None] | None = None
+
+
+def _per_minute_bucket(limit: int | None) -> TokenBucket | None:
+    if not limit:
+        return None
+    # A full minute of burst: that is what the provider allows per minute, and a
+    # single request reserves prompt + max_tokens (thousands of tokens), so a
+    # one-second bucket would stall even the first request of a run
+    return TokenBucket(limit / 60.0, float(limit))
+
+
+def buckets() -> tuple[TokenBucket | None, TokenBucket | None]:
+    """Process-wide (requests, tokens) buckets from OPENROUTER_RPM / OPENROUTER_TPM."""
+    global _buckets
+    if _buckets is None:
+        rpm, tpm = load_rate_limits()
+        _buckets = (_per_minute_bucket(rpm), _per_minute_bucket(tpm))
+    return _buckets
+
+
+async def throttle(tokens: int) -> None:
+    """Wait until one more request of ~*tokens* tokens fits under the configured limits."""
+    rpm, tpm = buckets()
+    if rpm:
+        await rpm.acquire(1)
+    if tpm:
+        await tpm.acquire(tokens)
@@ -0,0 +1,55 @@
+import asyncio
+import functools
+import random
+from .config import LOG
+
+MAX_ATTEMPTS = 6
+_BACKOFF_MIN = 1.0
+_BACKOFF_MAX = 30.0
+
+
+@functools.lru_cache(maxsize=1)
+def _transient_errors() -> tuple[type[Exception], ...]:
+    """Failures worth retrying: 429s, 5xx, and network/timeout errors."""
+    from openai import APIConnectionError, InternalServerError, RateLimitError
+    return RateLimitError, APIConnectionError, InternalServerError
+
+
+def _retry_after(e: Exception) -> float:
+    """Seconds the server asked us to wait via Retry-After (0 if it didn't say)."""
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return float(headers[name]) * scale
+        except (KeyError, TypeError, ValueError):
+            continue
+    return 0.0
+
+
+def _backoff_delay(attempt: int, e: Exception) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+    from openai import RateLimitError
+
+    delay = max(_BACKOFF_MIN, random.uniform(0, min(_BACKOFF_MAX, _BACKOFF_MIN * 2 ** attempt)))
+    if isinstance(e, RateLimitError):
+        delay = max(delay, _retry_after(e))
+    return delay
+
+
+async def call_with_retries(fn, *args, pace=None, **kwargs):
+    """Await ``fn(*args, **kwargs)``, retrying transient API errors with backoff.
+
+    The shared client is built with ``max_retries=0``, so every API call goes
+    through here. *pace*, if given, is awaited before each attempt (the rate limiter).
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        if pace is not None:
+            await pace()
+        try:
+            return await fn(*args, **kwargs)
+        except _transient_errors() as e:
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
+            delay = _backoff_delay(attempt, e)
+            LOG.warning("AI API attempt %s/%s failed (%s); retrying in %.1fs", attempt + 1, MAX_ATTEMPTS, e, delay)
+            await asyncio.sleep(delay)
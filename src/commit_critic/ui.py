@@ -1,3 +1,6 @@
+import sys
+from operator import attrgetter
+
 # ──────────────────────────────────────────────
 # ANSI helpers
 # ──────────────────────────────────────────────
@@ -15,65 +18,90 @@ RULE = "━" * 48
 def styled(text: str, *codes: str) -> str:
     return "".join(codes) + text + RESET
 
+
+# Fixed pieces of the report, styled once at import rather than per line
+RULE_RED = styled(RULE, RED)
+RULE_GREEN = styled(RULE, GREEN)
+RULE_MAGENTA = styled(RULE, MAGENTA)
+RULE_CYAN = styled(RULE, CYAN)
+HDR_BAD = styled("💩 COMMITS THAT NEED WORK", RED, BOLD)
+HDR_GOOD = styled("💎 WELL-WRITTEN COMMITS", GREEN, BOLD)
+HDR_STATS = styled("📊 YOUR STATS", MAGENTA, BOLD)
+SCORE_BAD = RED + BOLD
+SCORE_WARN = YELLOW + BOLD
+SCORE_GOOD = GREEN + BOLD
+
+
+def print_critique_progress(c, label: str = "") -> None:
+    """One-line progress note for a critique that just arrived from the LLM."""
+    lines = c.message.splitlines()
+    trunc = lines[0][:60] if lines else "(no message)"
+    print(styled(f"    {label}{c.hash[:7]}  {c.score:>2}/10  {trunc}", DIM))
+
+
+_by_score = attrgetter("score")
+
+
 def print_analysis(stats) -> None:
     bad = [c for c in stats.critiques if c.score < 7]
     good = [c for c in stats.critiques if c.score >= 7]
 
+    # The report is built up and written in one go rather than line by line
+    out: list[str] = []
+    append = out.append
+
     # ── Bad commits ──
     if bad:
-        print()
-        print(styled(RULE, RED))
-        print(styled("💩 COMMITS THAT NEED WORK", RED, BOLD))
-        print(styled(RULE, RED))
-        for c in sorted(bad, key=lambda x: x.score):
-            print()
+        append(f"\n{RULE_RED}\n{HDR_BAD}\n{RULE_RED}\n")
+        for c in sorted(bad, key=_by_score):
+            append("\n")
             lines = c.message.splitlines()
             trunc = lines[0][:80] if lines else "(no message)"
-            print(f'  Commit: {styled(f"{trunc!r}", YELLOW)}')
-            color = RED if c.score <= 3 else YELLOW
-            print(f"  Score:  {styled(f'{c.score}/10', color, BOLD)}")
+            append(f"  Commit: {YELLOW}{trunc!r}{RESET}\n")
+            color = SCORE_BAD if c.score <= 3 else SCORE_WARN
+            append(f"  Score:  {color}{c.score}/10{RESET}\n")
             if c.issue:
-                print(f"  Issue:  {c.issue}")
+                append(f"  Issue:  {c.issue}\n")
             if c.suggestion:
-                print(f"  Better: {styled(c.suggestion, GREEN)}")
+                append(f"  Better: {GREEN}{c.suggestion}{RESET}\n")
 
     # ── Good commits ──
     if good:
-        print()
-        print(styled(RULE, GREEN))
-        print(styled("💎 WELL-WRITTEN COMMITS", GREEN, BOLD))
-        print(styled(RULE, GREEN))
-        for c in sorted(good, key=lambda x: -x.score):
-            print()
+        append(f"\n{RULE_GREEN}\n{HDR_GOOD}\n{RULE_GREEN}\n")
+        for c in sorted(good, key=_by_score, reverse=True):
+            append("\n")
             lines = c.message.splitlines()
             trunc = lines[0][:80] if lines else "(no message)"
-            print(f'  Commit: {styled(f"{trunc!r}", CYAN)}')
-            print(f"  Score:  {styled(f'{c.score}/10', GREEN, BOLD)}")
+            append(f"  Commit: {CYAN}{trunc!r}{RESET}\n")
+            append(f"  Score:  {SCORE_GOOD}{c.score}/10{RESET}\n")
             if c.praise:
-                print(f"  Why:    {c.praise}")
+                append(f"  Why:    {c.praise}\n")
 
     # ── Stats ──
-    print()
-    print(styled(RULE, MAGENTA))
-    print(styled("📊 YOUR STATS", MAGENTA, BOLD))
-    print(styled(RULE, MAGENTA))
-    print(f"  Total commits analyzed : {stats.total}")
-    print(f"  Average score          : {styled(f'{stats.avg_score:.1f}/10', BOLD)}")
-    pct_vague = (stats.vague_count / stats.total * 100) if stats.total else 0
-    pct_decent = (stats.decent_count / stats.total * 100) if stats.total else 0
-    pct_one = (stats.one_word_count / stats.total * 100) if stats.total else 0
-    pct_good = (stats.good_count / stats.total * 100) if stats.total else 0
-    print(f"  One-word commits       : {stats.one_word_count} ({pct_one:.0f}%)")
-    print(f"  Vague commits (<5)     : {stats.vague_count} ({pct_vague:.0f}%)")
-    print(f"  Decent commits (5-6)   : {stats.decent_count} ({pct_decent:.0f}%)")
-    print(f"  Good commits (≥7)      : {stats.good_count} ({pct_good:.0f}%)")
-    print()
+    append(f"\n{RULE_MAGENTA}\n{HDR_STATS}\n{RULE_MAGENTA}\n")
+    append(f"  Total commits analyzed : {stats.total}\n")
+    append(f"  Average score          : {styled(f'{stats.avg_score:.1f}/10', BOLD)}\n")
+    inv = 100.0 / stats.total if stats.total else 0.0
+    pct_vague = stats.vague_count * inv
+    pct_decent = stats.decent_count * inv
+    pct_one = stats.one_word_count * inv
+    pct_good = stats.good_count * inv
+    append(f"  One-word commits       : {stats.one_word_count} ({pct_one:.0f}%)\n")
+    append(f"  Vague commits (<5)     : {stats.vague_count} ({pct_vague:.0f}%)\n")
+    append(f"  Decent commits (5-6)   : {stats.decent_count} ({pct_decent:.0f}%)\n")
+    append(f"  Good commits (≥7)      : {stats.good_count} ({pct_good:.0f}%)\n")
+    append("\n")
+    sys.stdout.write("".join(out))
+    sys.stdout.flush()
+
+
+def print_summary_preview(summary: str) -> None:
+    """Show the suggested summary line while the rest of the message is still streaming."""
+    print(styled(f"  {summary} …", DIM))
 
 
 def print_write_suggestion(data: dict) -> None:
     print()
-    print(styled("Analyzing staged changes…", DIM))
-    print()
 
     if data.get("changes_detected"):
         print(styled("Changes detected:", BOLD))
@@ -82,11 +110,11 @@ def print_write_suggestion(data: dict) -> None:
         print()
 
     print(styled("Suggested commit message:", BOLD))
-    print(styled(RULE, CYAN))
+    print(RULE_CYAN)
     print(styled(data["summary"], CYAN, BOLD))
     if data.get("body"):
         print()
         for b in data["body"]:
             print(f"  - {b}")
-    print(styled(RULE, CYAN))
+    print(RULE_CYAN)
     print()